@@ -1,13 +1,34 @@
+import os
+
+# DeepXDE only traces the PDE residual into a tf.function graph on the TF2 backend,
+# which imports tensorflow_probability on load (pinned in requirements.txt)
+os.environ.setdefault("DDE_BACKEND", "tensorflow")
+
 import numpy as np
 import tensorflow as tf
 import deepxde as dde
 from typing import Dict, List, Tuple, Optional, Any
 import json
 import pickle
-import os
+import re
 from dataclasses import dataclass
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Directory for checkpoints written by the training worker
+MODEL_DIR = os.environ.get("PINN_MODEL_DIR", "data/models")
+
+# Model ids double as checkpoint file names, so keep them to a single safe path component
+MODEL_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+# Let XLA fuse the residual graph and the small dense layers
+tf.config.optimizer.set_jit("autoclustering")
+dde.config.enable_xla_jit()
+
+# Far-field atmospheric state [rho, u, v, p]
+FAR_FIELD_STATE = tf.constant([[1.225, 0.0, 0.0, 101325.0]])
 
 @dataclass
 class PINNConfig:
@@ -32,6 +53,33 @@ class BlastWaveParams:
     domain_size: Tuple[float, float, float, float]  # [x_min, x_max, y_min, y_max]
     time_range: Tuple[float, float]  # [t_min, t_max]
 
+@tf.function(jit_compile=True, reduce_retracing=True)
+def blast_initial_state(x, center_x, center_y, explosive_mass):
+    """Compiled initial state [rho, u, v, p] around the blast center"""
+    x_coord, y_coord = x[:, 0:1], x[:, 1:2]
+    
+    # Distance from explosion center
+    r = tf.sqrt((x_coord - center_x)**2 + (y_coord - center_y)**2)
+    
+    # Initial blast parameters based on TNT equivalent
+    # Sedov-Taylor blast wave solution for initial conditions
+    E0 = explosive_mass * 4.6e6  # TNT energy in J/kg
+    rho0 = 1.225  # Air density at sea level
+    
+    # Initial pressure distribution (simplified)
+    p_init = tf.where(r < 1.0, 
+                     101325 + E0 / (4 * np.pi * r**2 + 1e-6),  # High pressure near center
+                     101325)  # Atmospheric pressure far away
+    
+    # Initial density (slightly perturbed)
+    rho_init = tf.where(r < 1.0, rho0 * 2.0, rho0)
+    
+    # Initial velocity (radial expansion)
+    u_init = tf.where(r < 1.0, (x_coord - center_x) / (r + 1e-6) * 100, 0.0)
+    v_init = tf.where(r < 1.0, (y_coord - center_y) / (r + 1e-6) * 100, 0.0)
+    
+    return tf.concat([rho_init, u_init, v_init, p_init], axis=1)
+
 class BlastWavePINN:
     """Physics-Informed Neural Network for blast wave simulation"""
     
@@ -40,6 +88,7 @@ class BlastWavePINN:
         self.blast_params = blast_params
         self.model = None
         self.trained = False
+        self._predict_fn = None
         
         # Set up DeepXDE backend
         dde.config.set_default_float("float32")
@@ -49,69 +98,53 @@ class BlastWavePINN:
         Define the 2D Euler equations for blast wave propagation
         x: input coordinates [x, y, t]
         y: output [rho, u, v, p] (density, velocity_x, velocity_y, pressure)
+        
+        DeepXDE calls this from inside its own compiled training step, so the
+        residual is traced into that graph rather than wrapped separately.
         """
         rho, u, v, p = y[:, 0:1], y[:, 1:2], y[:, 2:3], y[:, 3:4]
         
-        # Compute derivatives
-        rho_t = dde.grad.jacobian(y, x, i=0, j=2)
-        rho_x = dde.grad.jacobian(y, x, i=0, j=0)
-        rho_y = dde.grad.jacobian(y, x, i=0, j=1)
-        
-        u_t = dde.grad.jacobian(y, x, i=1, j=2)
-        u_x = dde.grad.jacobian(y, x, i=1, j=0)
-        u_y = dde.grad.jacobian(y, x, i=1, j=1)
+        # Compute derivatives: one reverse pass per output, columns are [x, y, t]
+        grad_rho = dde.grad.jacobian(y, x, i=0)
+        grad_u = dde.grad.jacobian(y, x, i=1)
+        grad_v = dde.grad.jacobian(y, x, i=2)
+        grad_p = dde.grad.jacobian(y, x, i=3)
         
-        v_t = dde.grad.jacobian(y, x, i=2, j=2)
-        v_x = dde.grad.jacobian(y, x, i=2, j=0)
-        v_y = dde.grad.jacobian(y, x, i=2, j=1)
+        rho_x, rho_y, rho_t = grad_rho[:, 0:1], grad_rho[:, 1:2], grad_rho[:, 2:3]
+        u_x, u_y, u_t = grad_u[:, 0:1], grad_u[:, 1:2], grad_u[:, 2:3]
+        v_x, v_y, v_t = grad_v[:, 0:1], grad_v[:, 1:2], grad_v[:, 2:3]
+        p_x, p_y = grad_p[:, 0:1], grad_p[:, 1:2]
         
-        p_x = dde.grad.jacobian(y, x, i=3, j=0)
-        p_y = dde.grad.jacobian(y, x, i=3, j=1)
+        # Mass fluxes shared by the momentum equations
+        rho_u = rho * u
+        rho_v = rho * v
         
         # 2D Euler equations
         # Continuity equation
-        continuity = rho_t + rho_x * u + rho * u_x + rho_y * v + rho * v_y
+        continuity = rho_t + rho_x * u + rho_y * v + rho * (u_x + v_y)
         
         # Momentum equations
-        momentum_x = rho * u_t + rho * u * u_x + rho * v * u_y + p_x
-        momentum_y = rho * v_t + rho * u * v_x + rho * v * v_y + p_y
+        momentum_x = rho * u_t + rho_u * u_x + rho_v * u_y + p_x
+        momentum_y = rho * v_t + rho_u * v_x + rho_v * v_y + p_y
         
         # Energy equation (simplified, assuming ideal gas)
         gamma = 1.4  # Heat capacity ratio for air
-        energy = p - (gamma - 1) * rho * (u**2 + v**2) / 2
+        energy = p - (gamma - 1) * rho * (u * u + v * v) / 2
         
         return [continuity, momentum_x, momentum_y, energy]
     
     def initial_condition(self, x):
         """Initial conditions for blast wave"""
-        x_coord, y_coord = x[:, 0:1], x[:, 1:2]
-        
-        # Distance from explosion center
-        r = tf.sqrt((x_coord - self.blast_params.center_x)**2 + 
-                   (y_coord - self.blast_params.center_y)**2)
-        
-        # Initial blast parameters based on TNT equivalent
-        # Sedov-Taylor blast wave solution for initial conditions
-        E0 = self.blast_params.explosive_mass * 4.6e6  # TNT energy in J/kg
-        rho0 = 1.225  # Air density at sea level
-        
-        # Initial pressure distribution (simplified)
-        p_init = tf.where(r < 1.0, 
-                         101325 + E0 / (4 * np.pi * r**2 + 1e-6),  # High pressure near center
-                         101325)  # Atmospheric pressure far away
-        
-        # Initial density (slightly perturbed)
-        rho_init = tf.where(r < 1.0, rho0 * 2.0, rho0)
-        
-        # Initial velocity (radial expansion)
-        u_init = tf.where(r < 1.0, (x_coord - self.blast_params.center_x) / (r + 1e-6) * 100, 0.0)
-        v_init = tf.where(r < 1.0, (y_coord - self.blast_params.center_y) / (r + 1e-6) * 100, 0.0)
-        
-        return tf.concat([rho_init, u_init, v_init, p_init], axis=1)
+        return blast_initial_state(
+            x,
+            tf.constant(self.blast_params.center_x, dtype=x.dtype),
+            tf.constant(self.blast_params.center_y, dtype=x.dtype),
+            tf.constant(self.blast_params.explosive_mass, dtype=x.dtype)
+        )
     
     def boundary_condition(self, x, on_boundary):
         """Boundary conditions (far-field conditions)"""
-        return tf.constant([[1.225, 0.0, 0.0, 101325.0]])  # Atmospheric conditions
+        return FAR_FIELD_STATE
     
     def create_geometry_and_data(self):
         """Create computational domain and training data"""
@@ -177,6 +210,7 @@ class BlastWavePINN:
             )
             
             self.trained = True
+            self._build_predictor()
             
             # Return training metrics
             return {
@@ -189,6 +223,15 @@ class BlastWavePINN:
         except Exception as e:
             raise Exception(f"PINN training failed: {str(e)}")
     
+    def _build_predictor(self):
+        """Trace the trained network once for any batch size of [x, y, t] points"""
+        self._predict_fn = tf.function(
+            self.model.net,
+            input_signature=[tf.TensorSpec([None, 3], tf.float32)],
+            jit_compile=True,
+            reduce_retracing=True
+        )
+    
     def predict(self, coordinates: np.ndarray) -> np.ndarray:
         """
         Predict blast wave fields at given coordinates
@@ -199,25 +242,40 @@ class BlastWavePINN:
             raise ValueError("Model must be trained before prediction")
         
         try:
-            predictions = self.model.predict(coordinates)
-            return predictions
+            coords = tf.constant(coordinates, dtype=tf.float32)
+            return self._predict_fn(coords).numpy()
         except Exception as e:
             raise Exception(f"PINN prediction failed: {str(e)}")
     
-    def save_model(self, filepath: str):
-        """Save trained model"""
+    def save_model(self, filepath: str) -> str:
+        """Save trained model and return the checkpoint path"""
         if not self.trained:
             raise ValueError("Cannot save untrained model")
         
-        self.model.save(filepath)
+        model_path = self.model.save(filepath)
         
         # Save configuration
-        config_path = filepath + "_config.json"
+        config_path = model_path + "_config.json"
         with open(config_path, 'w') as f:
             json.dump({
                 "config": self.config.__dict__,
                 "blast_params": self.blast_params.__dict__
             }, f)
+        
+        return model_path
+    
+    @classmethod
+    def from_checkpoint(cls, filepath: str) -> "BlastWavePINN":
+        """Rebuild a trained model from a checkpoint written by save_model"""
+        with open(filepath + "_config.json", 'r') as f:
+            saved_data = json.load(f)
+        
+        pinn = cls(
+            PINNConfig(**saved_data["config"]),
+            BlastWaveParams(**saved_data["blast_params"])
+        )
+        pinn.load_model(filepath)
+        return pinn
     
     def load_model(self, filepath: str):
         """Load trained model"""
@@ -234,13 +292,47 @@ class BlastWavePINN:
         # Load weights
         self.model.restore(filepath)
         self.trained = True
+        self._build_predictor()
+
+def train_model(
+    model_id: str,
+    config: PINNConfig,
+    blast_params: BlastWaveParams,
+    training_data: Optional[np.ndarray] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """Train a PINN in a worker process and return its checkpoint path and metrics"""
+    pinn = BlastWavePINN(config, blast_params)
+    metrics = pinn.train(training_data)
+    
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    model_path = pinn.save_model(os.path.join(MODEL_DIR, model_id))
+    return model_path, metrics
 
 class PINNSimulationEngine:
     """High-level interface for PINN-based blast wave simulations"""
     
     def __init__(self):
+        # Loaded models; only touched from the predict executor's thread
         self.models = {}
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.model_paths = {}
+        # Executors are created on first use so spawned training workers, which
+        # re-import this module, don't build pools of their own
+        self._executor = None
+        self._predict_executor = None
+    
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Training runs in a separate process so it never competes with the event loop"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn"))
+        return self._executor
+    
+    @property
+    def predict_executor(self) -> ThreadPoolExecutor:
+        """Models are loaded, traced and run on one thread so its TF state stays warm"""
+        if self._predict_executor is None:
+            self._predict_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pinn-pred")
+        return self._predict_executor
     
     async def create_and_train_model(
         self, 
@@ -250,19 +342,35 @@ class PINNSimulationEngine:
         training_data: Optional[np.ndarray] = None
     ) -> Dict[str, Any]:
         """Create and train a new PINN model asynchronously"""
+        if not isinstance(model_id, str) or not MODEL_ID_PATTERN.fullmatch(model_id):
+            raise ValueError(f"Invalid model id {model_id!r}: use letters, digits, '_' or '-'")
         
-        def train_model():
-            pinn = BlastWavePINN(config, blast_params)
-            metrics = pinn.train(training_data)
-            return pinn, metrics
-        
-        # Run training in thread pool to avoid blocking
+        # Run training in the worker process; only the checkpoint path comes back
         loop = asyncio.get_event_loop()
-        pinn, metrics = await loop.run_in_executor(self.executor, train_model)
-        
-        self.models[model_id] = pinn
+        try:
+            model_path, metrics = await loop.run_in_executor(
+                self.executor, train_model, model_id, config, blast_params, training_data
+            )
+        except BrokenProcessPool:
+            # The worker died (e.g. OOM-killed); drop the pool so the next run gets a fresh one
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            raise
+        
+        def publish():
+            self.model_paths[model_id] = model_path
+            self.models.pop(model_id, None)
+        
+        # Swap the checkpoint in on the predict thread so it can't race get_model
+        await loop.run_in_executor(self.predict_executor, publish)
         return metrics
     
+    def get_model(self, model_id: str) -> BlastWavePINN:
+        """Return a trained model, loading its weights on first use"""
+        if model_id not in self.models:
+            self.models[model_id] = BlastWavePINN.from_checkpoint(self.model_paths[model_id])
+        return self.models[model_id]
+    
     async def predict_frame(
         self, 
         model_id: str, 
@@ -270,16 +378,14 @@ class PINNSimulationEngine:
     ) -> Dict[str, np.ndarray]:
         """Predict blast wave fields for a single frame"""
         
-        if model_id not in self.models:
+        if model_id not in self.model_paths:
             raise ValueError(f"Model {model_id} not found")
         
-        pinn = self.models[model_id]
-        
         def predict():
-            return pinn.predict(coordinates)
+            return self.get_model(model_id).predict(coordinates)
         
         loop = asyncio.get_event_loop()
-        predictions = await loop.run_in_executor(self.executor, predict)
+        predictions = await loop.run_in_executor(self.predict_executor, predict)
         
         # Split predictions into components
         rho = predictions[:, 0]
@@ -295,6 +401,45 @@ class PINNSimulationEngine:
             "coordinates": coordinates
         }
     
+    async def predict_frames(
+        self,
+        model_id: str,
+        xy_grid: np.ndarray,
+        t_values: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Predict blast wave fields for several frames in a single forward pass
+        xy_grid: array of shape (H, W, 2) with [x, y] values shared by all frames
+        t_values: array of shape (T,) with the frame times
+        Returns: component arrays of shape (T, H, W)
+        """
+        if model_id not in self.model_paths:
+            raise ValueError(f"Model {model_id} not found")
+        
+        height, width = xy_grid.shape[:2]
+        points = xy_grid.reshape(-1, 2)
+        num_frames = len(t_values)
+        
+        # Every frame reuses the spatial grid; only the time column changes
+        coordinates = np.empty((num_frames * points.shape[0], 3), np.float32)
+        coordinates[:, :2] = np.tile(points, (num_frames, 1))
+        coordinates[:, 2] = np.repeat(t_values, points.shape[0])
+        
+        def predict():
+            return self.get_model(model_id).predict(coordinates)
+        
+        loop = asyncio.get_event_loop()
+        predictions = await loop.run_in_executor(self.predict_executor, predict)
+        predictions = predictions.reshape(num_frames, height, width, 4)
+        
+        return {
+            "density": predictions[..., 0],
+            "velocity_x": predictions[..., 1],
+            "velocity_y": predictions[..., 2],
+            "pressure": predictions[..., 3],
+            "time": np.asarray(t_values)
+        }
+    
     def get_pretrained_model_config(self) -> PINNConfig:
         """Get configuration for pre-trained blast wave model"""
         return PINNConfig(
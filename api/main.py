@@ -1,14 +1,22 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import asyncio
-import json
+import base64
+import io
+import math
+import os
+import shutil
 import numpy as np
-from typing import List, Dict, Any
+import orjson
+from numba import njit
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, field, fields
 import uuid
 from datetime import datetime
 import logging
-from real_time_data import get_real_time_urban_data
+from real_time_data import get_real_time_urban_data, close_session, UrbanDataResponse
 from deepxde_integration import pinn_engine, PINNConfig, BlastWaveParams
 
 # Configure logging
@@ -30,33 +38,204 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Field grid sizes and wavefront ring half-widths (in grid cells)
+PRESSURE_GRID_SIZE = 50
+PRESSURE_RING_WIDTH = 5
+VELOCITY_GRID_SIZE = 25
+VELOCITY_RING_WIDTH = 3
+
+@njit(cache=True, fastmath=True, nogil=True)
+def pressure_field_kernel(r: np.ndarray, t: float) -> np.ndarray:
+    """Blast wave pressure ring over a grid of distances from the center"""
+    field = np.empty(r.shape, np.float32)
+    wave_radius = t * 30  # Wave speed
+    peak = 15.0 * math.exp(-t * 0.5)
+    
+    for i in range(r.shape[0]):
+        for j in range(r.shape[1]):
+            d = abs(r[i, j] - wave_radius)
+            field[i, j] = peak * (1 - d / PRESSURE_RING_WIDTH) if d < PRESSURE_RING_WIDTH else 0.0
+    
+    return field
+
+@njit(cache=True, fastmath=True, nogil=True)
+def velocity_field_kernel(
+    dx: np.ndarray, dy: np.ndarray, r: np.ndarray, t: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Radial velocity components on the wavefront over a grid of center offsets"""
+    vx = np.zeros(r.shape, np.float32)
+    vy = np.zeros(r.shape, np.float32)
+    wave_radius = t * 30
+    magnitude = 300.0 * math.exp(-t * 0.3)
+    
+    for i in range(r.shape[0]):
+        for j in range(r.shape[1]):
+            if r[i, j] > 0 and abs(r[i, j] - wave_radius) < VELOCITY_RING_WIDTH:
+                vx[i, j] = magnitude * dx[i, j] / r[i, j]
+                vy[i, j] = magnitude * dy[i, j] / r[i, j]
+    
+    return vx, vy
+
+# Compile the kernels at import so the first simulation doesn't pay for it
+_warmup_grid = np.zeros((2, 2))
+pressure_field_kernel(_warmup_grid, 0.0)
+velocity_field_kernel(_warmup_grid, _warmup_grid, _warmup_grid, 0.0)
+
+# Recent frames kept in memory per simulation; every frame is spilled to disk
+FRAME_BUFFER_SIZE = 16
+FRAMES_DIR = os.environ.get("SIMULATION_FRAMES_DIR", "data/frames")
+# Spilled frames live as long as their in-memory simulation record; directories left
+# behind by earlier processes are unreachable and removed at startup
+
+# Frame cadence for streamed simulations
+TARGET_FPS = 10
+
+@dataclass(slots=True)
+class FrameData:
+    """Scalars and field arrays for a single simulation frame"""
+    frame: int
+    time: float
+    max_pressure: float
+    max_velocity: float
+    fields_active: bool
+    pressure_field: Optional[np.ndarray] = None
+    velocity_x: Optional[np.ndarray] = None
+    velocity_y: Optional[np.ndarray] = None
+    
+    def to_wire(self) -> Dict[str, Any]:
+        """Transport form of the frame with velocity sent as polar magnitude/angle fields"""
+        wire_frame = {
+            "frame": self.frame,
+            "time": self.time,
+            "max_pressure": self.max_pressure,
+            "max_velocity": self.max_velocity,
+            "fields_active": self.fields_active,
+            "pressure_field": self.pressure_field,
+            "velocity_magnitude": None,
+            "velocity_angle": None
+        }
+        if self.velocity_x is not None:
+            wire_frame["velocity_magnitude"] = encode_field(np.hypot(self.velocity_x, self.velocity_y))
+            wire_frame["velocity_angle"] = encode_field(
+                np.arctan2(self.velocity_y, self.velocity_x), -np.pi, np.pi
+            )
+        return wire_frame
+    
+    def to_arrays(self) -> Dict[str, Any]:
+        """Non-empty fields of the frame, keyed for np.savez"""
+        values = ((f.name, getattr(self, f.name)) for f in fields(self))
+        return {name: value for name, value in values if value is not None}
+
+@dataclass(slots=True)
+class SimulationMetadata:
+    """Run-wide simulation statistics"""
+    total_frames: int = 250
+    max_pressure: float = 0
+    max_velocity: float = 0
+    affected_area: float = 0
+
+@dataclass(slots=True)
+class Simulation:
+    """Simulation record with its most recent frames"""
+    id: str
+    name: str
+    config: Dict[str, Any]
+    created_at: str
+    status: str = "queued"
+    progress: int = 0
+    frames: deque = field(default_factory=lambda: deque(maxlen=FRAME_BUFFER_SIZE))
+    metadata: SimulationMetadata = field(default_factory=SimulationMetadata)
+
 # In-memory storage for demo (use database in production)
-simulations_db: Dict[str, Dict[str, Any]] = {}
+simulations_db: Dict[str, Simulation] = {}
 active_connections: Dict[str, List[WebSocket]] = {}
 
+def encode_field(field: np.ndarray, lo: Optional[float] = None, hi: Optional[float] = None) -> Dict[str, Any]:
+    """Quantize a field to uint8 over [lo, hi] and pack it as a base64 buffer"""
+    if lo is None:
+        lo = float(field.min()) if field.size else 0.0
+    if hi is None:
+        hi = float(field.max()) if field.size else 0.0
+    
+    scale = 255.0 / (hi - lo) if hi > lo else 0.0
+    quantized = np.rint((field - lo) * scale).astype(np.uint8)
+    
+    return {
+        "lo": lo,
+        "hi": hi,
+        "shape": list(field.shape),
+        "dtype": "uint8",
+        "data": base64.b64encode(quantized.tobytes()).decode("ascii")
+    }
+
+def encode_default(obj: Any) -> Any:
+    """orjson fallback that packs field arrays as base64 buffers"""
+    if isinstance(obj, np.ndarray):
+        return encode_field(obj)
+    if isinstance(obj, deque):
+        return [frame_data.to_wire() for frame_data in obj]
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dump_payload(data: Any) -> bytes:
+    """Serialize an API or WebSocket payload to JSON bytes"""
+    return orjson.dumps(data, default=encode_default)
+
+class FieldJSONResponse(JSONResponse):
+    """JSON response that can carry simulation field arrays"""
+    def render(self, content: Any) -> bytes:
+        return dump_payload(content)
+
+def save_frame(path: str, arrays: Dict[str, np.ndarray]):
+    """Write a frame .npz atomically so readers never see a partial file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+def prune_frame_dirs():
+    """Remove spilled frame directories that belong to no known simulation"""
+    if not os.path.isdir(FRAMES_DIR):
+        return
+    
+    for entry in os.scandir(FRAMES_DIR):
+        if entry.name in simulations_db:
+            continue
+        try:
+            if entry.is_dir():
+                shutil.rmtree(entry.path)
+        except OSError as e:
+            logger.warning(f"Could not remove frame directory {entry.path}: {e}")
+
 class SimulationManager:
     def __init__(self):
         self.simulations = {}
+        
+        # Distance grids never change between frames; only the wave radius does
+        center = PRESSURE_GRID_SIZE // 2
+        i, j = np.ogrid[:PRESSURE_GRID_SIZE, :PRESSURE_GRID_SIZE]
+        self.pressure_r = np.hypot(i - center, j - center)
+        
+        center = VELOCITY_GRID_SIZE // 2
+        offsets = np.arange(VELOCITY_GRID_SIZE, dtype=np.float64) - center
+        self.velocity_dx, self.velocity_dy = np.meshgrid(offsets, offsets, indexing="ij")
+        self.velocity_r = np.hypot(self.velocity_dx, self.velocity_dy)
+        
+        # Largest wave radius at which the ring still touches either grid
+        self.field_reach = max(
+            self.pressure_r.max() + PRESSURE_RING_WIDTH,
+            self.velocity_r.max() + VELOCITY_RING_WIDTH
+        )
     
     async def create_simulation(self, config: Dict[str, Any]) -> str:
         """Create a new simulation with given configuration"""
         sim_id = str(uuid.uuid4())
         
-        simulation = {
-            "id": sim_id,
-            "name": config.get("name", f"Simulation {sim_id[:8]}"),
-            "status": "queued",
-            "progress": 0,
-            "config": config,
-            "created_at": datetime.utcnow().isoformat(),
-            "frames": [],
-            "metadata": {
-                "total_frames": 250,
-                "max_pressure": 0,
-                "max_velocity": 0,
-                "affected_area": 0
-            }
-        }
+        simulation = Simulation(
+            id=sim_id,
+            name=config.get("name", f"Simulation {sim_id[:8]}"),
+            config=config,
+            created_at=datetime.utcnow().isoformat()
+        )
         
         simulations_db[sim_id] = simulation
         
@@ -67,28 +246,35 @@ class SimulationManager:
     
     async def process_simulation(self, sim_id: str):
         """Process simulation in background"""
+        frame_queue: asyncio.Queue = asyncio.Queue()
+        frame_writer = asyncio.create_task(self.write_frames(sim_id, frame_queue))
+        
         try:
             simulation = simulations_db[sim_id]
-            simulation["status"] = "running"
+            simulation.status = "running"
             
-            total_frames = simulation["metadata"]["total_frames"]
+            total_frames = simulation.metadata.total_frames
+            
+            loop = asyncio.get_event_loop()
+            frame_interval = 1 / TARGET_FPS
+            next_deadline = loop.time() + frame_interval
             
             for frame in range(total_frames):
-                # Simulate processing time
-                await asyncio.sleep(0.1)
-                
                 # Update progress
                 progress = int((frame + 1) / total_frames * 100)
-                simulation["progress"] = progress
+                simulation.progress = progress
                 
-                # Generate mock frame data
-                frame_data = self.generate_frame_data(frame, total_frames)
-                simulation["frames"].append(frame_data)
+                # Generate mock frame data off the event loop
+                frame_data = await loop.run_in_executor(
+                    None, self.generate_frame_data, frame, total_frames
+                )
+                simulation.frames.append(frame_data)
+                frame_queue.put_nowait(frame_data)
                 
                 # Update metadata
-                simulation["metadata"]["max_pressure"] = max(
-                    simulation["metadata"]["max_pressure"], 
-                    frame_data["max_pressure"]
+                simulation.metadata.max_pressure = max(
+                    simulation.metadata.max_pressure, 
+                    frame_data.max_pressure
                 )
                 
                 # Broadcast progress to connected clients
@@ -96,11 +282,20 @@ class SimulationManager:
                     "frame": frame,
                     "progress": progress,
                     "status": "running",
-                    "frame_data": frame_data
+                    "frame_data": frame_data.to_wire()
                 })
+                
+                # Pace frames against a monotonic deadline so compute time isn't added on top
+                delay = next_deadline - loop.time()
+                next_deadline += frame_interval
+                await asyncio.sleep(max(0, delay))
+            
+            # Flush spilled frames before reporting completion
+            await frame_queue.put(None)
+            await frame_writer
             
-            simulation["status"] = "completed"
-            simulation["progress"] = 100
+            simulation.status = "completed"
+            simulation.progress = 100
             
             await self.broadcast_progress(sim_id, {
                 "status": "completed",
@@ -109,101 +304,129 @@ class SimulationManager:
             
         except Exception as e:
             logger.error(f"Error processing simulation {sim_id}: {e}")
-            simulation["status"] = "failed"
+            frame_writer.cancel()
+            simulation.status = "failed"
             await self.broadcast_progress(sim_id, {
                 "status": "failed",
                 "error": str(e)
             })
     
-    def generate_frame_data(self, frame: int, total_frames: int) -> Dict[str, Any]:
-        """Generate mock frame data for visualization"""
+    async def write_frames(self, sim_id: str, frame_queue: asyncio.Queue):
+        """Write queued frames to disk as .npz files until a None sentinel arrives"""
+        frame_dir = os.path.join(FRAMES_DIR, sim_id)
+        os.makedirs(frame_dir, exist_ok=True)
+        loop = asyncio.get_event_loop()
+        
+        while True:
+            frame_data = await frame_queue.get()
+            if frame_data is None:
+                break
+            
+            path = os.path.join(frame_dir, f"{frame_data.frame:04d}.npz")
+            await loop.run_in_executor(None, save_frame, path, frame_data.to_arrays())
+    
+    def load_frame_summaries(self, sim_id: str) -> Iterator[Dict[str, Any]]:
+        """Read per-frame scalars for a simulation back from disk in frame order"""
+        frame_dir = os.path.join(FRAMES_DIR, sim_id)
+        if not os.path.isdir(frame_dir):
+            return
+        
+        # Skip frames still being written; they only appear under .npz once complete
+        for name in sorted(n for n in os.listdir(frame_dir) if n.endswith(".npz")):
+            with np.load(os.path.join(frame_dir, name)) as frame:
+                yield {
+                    "frame": int(frame["frame"]),
+                    "time": float(frame["time"]),
+                    "max_pressure": float(frame["max_pressure"]),
+                    "max_velocity": float(frame["max_velocity"])
+                }
+    
+    def export_csv(self, sim_id: str) -> bytes:
+        """Build the CSV export of a simulation's per-frame scalars"""
+        summaries = np.fromiter(
+            (
+                (f["frame"], f["time"], f["max_pressure"], f["max_velocity"])
+                for f in self.load_frame_summaries(sim_id)
+            ),
+            dtype=[("frame", "i4"), ("time", "f8"), ("max_pressure", "f8"), ("max_velocity", "f8")]
+        )
+        csv_buffer = io.BytesIO()
+        np.savetxt(
+            csv_buffer,
+            summaries,
+            fmt="%d,%.6g,%.6g,%.6g",
+            header="frame,time,max_pressure,max_velocity",
+            comments=""
+        )
+        return csv_buffer.getvalue()
+    
+    def generate_frame_data(self, frame: int, total_frames: int) -> FrameData:
+        """
+        Generate mock frame data for visualization
+        
+        Once the wavefront has left both grids every field cell is zero, so the
+        fields are returned as None with fields_active set to False.
+        """
         t = frame / total_frames * 10  # 10 seconds total
         
         # Simulate blast wave propagation
         max_pressure = 15.0 * np.exp(-t * 0.5) * max(0, np.sin(t * 2))
         max_velocity = 350.0 * np.exp(-t * 0.3) * max(0, np.cos(t * 1.5))
         
-        return {
-            "frame": frame,
-            "time": t,
-            "max_pressure": float(max_pressure),
-            "max_velocity": float(max_velocity),
-            "pressure_field": self.generate_pressure_field(t),
-            "velocity_field": self.generate_velocity_field(t)
-        }
-    
-    def generate_pressure_field(self, t: float) -> List[List[float]]:
-        """Generate 2D pressure field data"""
-        size = 50
-        field = []
-        center = size // 2
+        frame_data = FrameData(
+            frame=frame,
+            time=t,
+            max_pressure=float(max_pressure),
+            max_velocity=float(max_velocity),
+            fields_active=self.fields_active(t)
+        )
         
-        for i in range(size):
-            row = []
-            for j in range(size):
-                # Distance from center
-                r = np.sqrt((i - center)**2 + (j - center)**2)
-                
-                # Blast wave equation (simplified)
-                wave_radius = t * 30  # Wave speed
-                if abs(r - wave_radius) < 5:
-                    pressure = 15.0 * np.exp(-t * 0.5) * (1 - abs(r - wave_radius) / 5)
-                else:
-                    pressure = 0.0
-                
-                row.append(max(0, pressure))
-            field.append(row)
+        if frame_data.fields_active:
+            frame_data.pressure_field = self.generate_pressure_field(t)
+            frame_data.velocity_x, frame_data.velocity_y = self.generate_velocity_field(t)
         
-        return field
+        return frame_data
     
-    def generate_velocity_field(self, t: float) -> List[List[Dict[str, float]]]:
-        """Generate 2D velocity field data"""
-        size = 25  # Smaller for velocity vectors
-        field = []
-        center = size // 2
-        
-        for i in range(size):
-            row = []
-            for j in range(size):
-                # Distance and angle from center
-                dx = i - center
-                dy = j - center
-                r = np.sqrt(dx**2 + dy**2)
-                
-                if r > 0:
-                    # Radial velocity
-                    wave_radius = t * 30
-                    if abs(r - wave_radius) < 3:
-                        magnitude = 300.0 * np.exp(-t * 0.3)
-                        vx = magnitude * dx / r
-                        vy = magnitude * dy / r
-                    else:
-                        vx = vy = 0.0
-                else:
-                    vx = vy = 0.0
-                
-                row.append({"x": vx, "y": vy})
-            field.append(row)
-        
-        return field
+    def fields_active(self, t: float) -> bool:
+        """Whether the wavefront ring still overlaps the pressure or velocity grid"""
+        return bool(t * 30 < self.field_reach)
+    
+    def generate_pressure_field(self, t: float) -> np.ndarray:
+        """Generate 2D pressure field data"""
+        return pressure_field_kernel(self.pressure_r, t)
+    
+    def generate_velocity_field(self, t: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Generate 2D velocity field data as separate x and y component arrays"""
+        return velocity_field_kernel(self.velocity_dx, self.velocity_dy, self.velocity_r, t)
     
     async def broadcast_progress(self, sim_id: str, data: Dict[str, Any]):
         """Broadcast progress to all connected WebSocket clients"""
         if sim_id in active_connections:
-            disconnected = []
-            for websocket in active_connections[sim_id]:
-                try:
-                    await websocket.send_text(json.dumps(data))
-                except:
-                    disconnected.append(websocket)
+            message = dump_payload(data)
+            connections = list(active_connections[sim_id])
+            results = await asyncio.gather(
+                *(websocket.send_bytes(message) for websocket in connections),
+                return_exceptions=True
+            )
             
             # Remove disconnected clients
-            for ws in disconnected:
-                active_connections[sim_id].remove(ws)
+            for ws, result in zip(connections, results):
+                if isinstance(result, Exception) and ws in active_connections[sim_id]:
+                    active_connections[sim_id].remove(ws)
 
 # Initialize simulation manager
 sim_manager = SimulationManager()
 
+@app.on_event("startup")
+async def startup():
+    """Clear frames spilled by earlier processes off the event loop"""
+    await asyncio.get_running_loop().run_in_executor(None, prune_frame_dirs)
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release pooled connections to the external data APIs"""
+    await close_session()
+
 @app.get("/")
 async def root():
     return {"message": "ShockWave Sim AI API", "version": "1.0.0", "status": "running"}
@@ -221,18 +444,18 @@ async def create_simulation(config: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/simulations")
+@app.get("/api/simulations", response_class=FieldJSONResponse)
 async def list_simulations():
     """List all simulations"""
-    return {"simulations": list(simulations_db.values())}
+    return FieldJSONResponse({"simulations": list(simulations_db.values())})
 
-@app.get("/api/simulations/{sim_id}")
+@app.get("/api/simulations/{sim_id}", response_class=FieldJSONResponse)
 async def get_simulation(sim_id: str):
     """Get simulation details"""
     if sim_id not in simulations_db:
         raise HTTPException(status_code=404, detail="Simulation not found")
     
-    return simulations_db[sim_id]
+    return FieldJSONResponse(simulations_db[sim_id])
 
 @app.websocket("/api/simulations/{sim_id}/stream")
 async def websocket_simulation_stream(websocket: WebSocket, sim_id: str):
@@ -248,12 +471,12 @@ async def websocket_simulation_stream(websocket: WebSocket, sim_id: str):
     try:
         # Send current simulation state
         if sim_id in simulations_db:
-            await websocket.send_text(json.dumps({
+            await websocket.send_bytes(dump_payload({
                 "type": "simulation_state",
                 "data": simulations_db[sim_id]
             }))
         else:
-            await websocket.send_text(json.dumps({
+            await websocket.send_bytes(dump_payload({
                 "type": "error",
                 "message": f"Simulation {sim_id} not found"
             }))
@@ -262,11 +485,11 @@ async def websocket_simulation_stream(websocket: WebSocket, sim_id: str):
         while True:
             try:
                 message = await websocket.receive_text()
-                data = json.loads(message)
+                data = orjson.loads(message)
                 
                 # Handle client commands
                 if data.get("action") == "ping":
-                    await websocket.send_text(json.dumps({"type": "pong"}))
+                    await websocket.send_bytes(dump_payload({"type": "pong"}))
                     
             except WebSocketDisconnect:
                 break
@@ -311,6 +534,8 @@ async def train_pinn_model(config: Dict[str, Any]):
             "metrics": metrics
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"PINN training error: {e}")
         raise HTTPException(status_code=500, detail=f"PINN training failed: {str(e)}")
@@ -377,7 +602,7 @@ async def get_urban_mesh(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/api/real-time-urban-data")
+@app.get("/api/real-time-urban-data", response_class=UrbanDataResponse)
 async def get_real_time_data(bbox: str):
     """Fetch real-time urban data from OSM and elevation APIs"""
     return await get_real_time_urban_data(bbox)
@@ -388,13 +613,14 @@ async def export_simulation(sim_id: str, format: str = "csv"):
     if sim_id not in simulations_db:
         raise HTTPException(status_code=404, detail="Simulation not found")
     
-    simulation = simulations_db[sim_id]
+    # A simulation that produced frames but has no spill directory has lost its data
+    if simulations_db[sim_id].frames and not os.path.isdir(os.path.join(FRAMES_DIR, sim_id)):
+        raise HTTPException(status_code=410, detail="Simulation frames are no longer available")
     
     if format == "csv":
-        # Generate CSV data
-        csv_data = "frame,time,max_pressure,max_velocity\n"
-        for frame_data in simulation["frames"]:
-            csv_data += f"{frame_data['frame']},{frame_data['time']},{frame_data['max_pressure']},{frame_data['max_velocity']}\n"
+        # Reading every spilled frame is blocking file I/O, so build the CSV off the event loop
+        loop = asyncio.get_event_loop()
+        csv_data = await loop.run_in_executor(None, sim_manager.export_csv, sim_id)
         
         return StreamingResponse(
             iter([csv_data]),
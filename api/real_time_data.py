@@ -1,271 +1,412 @@
 import asyncio
 import aiohttp
-import json
-from typing import List, Dict, Any, Optional
+import functools
+import re
+import time
+import types
+import urllib.parse
+from collections import OrderedDict
+import msgspec
+import orjson
+from typing import List, Dict, Any, Iterable, Mapping, Optional, Tuple
 from dataclasses import dataclass
 import numpy as np
 from xml.etree import ElementTree as ET
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BoundingBox:
     south: float
     west: float
     north: float
     east: float
 
-@dataclass
-class OSMBuilding:
+# Features are shared through the OSM cache, so their arrays and tags are read-only too
+class OSMBuilding(msgspec.Struct, frozen=True):
     id: str
-    coordinates: List[List[float]]
-    tags: Dict[str, str]
-    calculated_height: float
+    coordinates: np.ndarray  # (N, 2) [lon, lat], read-only
+    tags: Mapping[str, str]
+    calculated_height: float = msgspec.field(name="height")
 
-@dataclass
-class OSMRoad:
+class OSMRoad(msgspec.Struct, frozen=True):
     id: str
-    coordinates: List[List[float]]
-    tags: Dict[str, str]
+    coordinates: np.ndarray  # (N, 2) [lon, lat], read-only
+    tags: Mapping[str, str]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ElevationPoint:
     lat: float
     lng: float
     elevation: float
 
+# Overpass response schema; fields not listed here are skipped by the decoder
+class OverpassElement(msgspec.Struct):
+    type: str
+    id: int
+    lon: float = 0.0
+    lat: float = 0.0
+    nodes: List[int] = []
+    tags: Dict[str, str] = {}
+
+class OverpassResponse(msgspec.Struct):
+    elements: List[OverpassElement] = []
+
+_OVERPASS_DECODER = msgspec.json.Decoder(OverpassResponse)
+
+# Process-wide session so connections to the data APIs are pooled and kept alive
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+# Recent Overpass results keyed by query kind and bbox rounded to 4 decimals (~10 m)
+OSM_CACHE_SIZE = 64
+OSM_CACHE_TTL = 600.0  # seconds
+_OSM_CACHE: "OrderedDict[Tuple[Any, ...], Tuple[Any, float]]" = OrderedDict()
+
+def _osm_cache_key(kind: str, bbox: "BoundingBox") -> Tuple[Any, ...]:
+    return (kind, round(bbox.south, 4), round(bbox.west, 4), round(bbox.north, 4), round(bbox.east, 4))
+
+def _osm_cache_get(key: Tuple[Any, ...]) -> Optional[Any]:
+    """Return a cached result if it is still fresh, marking it most recently used"""
+    entry = _OSM_CACHE.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[1] > OSM_CACHE_TTL:
+        del _OSM_CACHE[key]
+        return None
+    _OSM_CACHE.move_to_end(key)
+    return entry[0]
+
+def _osm_cache_put(key: Tuple[Any, ...], value: Any):
+    """Store a result, evicting the least recently used entries beyond the size limit"""
+    _OSM_CACHE[key] = (value, time.monotonic())
+    _OSM_CACHE.move_to_end(key)
+    while len(_OSM_CACHE) > OSM_CACHE_SIZE:
+        _OSM_CACHE.popitem(last=False)
+
+# Highway classes treated as roads; the Overpass query and the client-side filter share it
+ROAD_HIGHWAY_TYPES = "primary|secondary|tertiary|residential|trunk|motorway"
+_ROAD_HIGHWAY_PATTERN = re.compile(ROAD_HIGHWAY_TYPES)
+
+def _overpass_form(query: bytes) -> bytes:
+    """URL-encode an Overpass query template as a form body, keeping its %.7f placeholders"""
+    parts = query.split(b"%.7f")
+    encoded = [
+        urllib.parse.quote_from_bytes(part, safe="").replace("%", "%%").encode("ascii")
+        for part in parts
+    ]
+    return b"data=" + b"%.7f".join(encoded)
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the shared HTTP session, creating it on first use"""
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, keepalive_timeout=75)
+        )
+    return _SESSION
+
+async def close_session():
+    """Close the shared HTTP session (called on application shutdown)"""
+    global _SESSION
+    if _SESSION is not None:
+        await _SESSION.close()
+        _SESSION = None
+
 class RealTimeDataFetcher:
+    # Pre-encoded Overpass form body; each bbox clause takes (south, west, north, east).
+    # Buildings and roads share one query so the node recursion (>;) runs once server-side
+    FEATURES_QUERY = _overpass_form(
+        b'[out:json][timeout:25];'
+        b'(way["building"](%.7f,%.7f,%.7f,%.7f);relation["building"](%.7f,%.7f,%.7f,%.7f);'
+        b'way["highway"~"^(' + ROAD_HIGHWAY_TYPES.encode("ascii") + b')$"](%.7f,%.7f,%.7f,%.7f););'
+        b'out body;>;out skel qt;'
+    )
+
     def __init__(self):
         self.overpass_url = "https://overpass-api.de/api/interpreter"
         self.elevation_url = "https://api.open-elevation.com/api/v1/lookup"
-        self.session: Optional[aiohttp.ClientSession] = None
-
-    async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
-
-    async def fetch_osm_buildings(self, bbox: BoundingBox) -> List[OSMBuilding]:
-        """Fetch building data from OpenStreetMap Overpass API"""
-        query = f"""
-        [out:json][timeout:25];
-        (
-          way["building"]({bbox.south},{bbox.west},{bbox.north},{bbox.east});
-          relation["building"]({bbox.south},{bbox.west},{bbox.north},{bbox.east});
-        );
-        out body;
-        >;
-        out skel qt;
-        """
+        self.elevation_concurrency = 8  # Concurrent Open-Elevation requests
+        self.session = get_session()
 
-        try:
-            async with self.session.post(
-                self.overpass_url,
-                data={"data": query},
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"OSM API error: {response.status}")
-                
-                data = await response.json()
-                return self._process_buildings(data)
-                
-        except Exception as e:
-            print(f"Error fetching OSM buildings: {e}")
-            return []
-
-    async def fetch_osm_roads(self, bbox: BoundingBox) -> List[OSMRoad]:
-        """Fetch road data from OpenStreetMap Overpass API"""
-        query = f"""
-        [out:json][timeout:25];
-        (
-          way["highway"~"^(primary|secondary|tertiary|residential|trunk|motorway)$"]({bbox.south},{bbox.west},{bbox.north},{bbox.east});
-        );
-        out body;
-        >;
-        out skel qt;
-        """
+    async def fetch_osm_features(self, bbox: BoundingBox) -> Tuple[Tuple[OSMBuilding, ...], Tuple[OSMRoad, ...]]:
+        """Fetch building and road data from OpenStreetMap Overpass API in a single query"""
+        cache_key = _osm_cache_key("features", bbox)
+        cached = _osm_cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        bounds = (bbox.south, bbox.west, bbox.north, bbox.east)
+        query = self.FEATURES_QUERY % (bounds * 3)
 
         try:
             async with self.session.post(
                 self.overpass_url,
-                data={"data": query},
+                data=query,
                 headers={"Content-Type": "application/x-www-form-urlencoded"}
             ) as response:
                 if response.status != 200:
                     raise Exception(f"OSM API error: {response.status}")
                 
-                data = await response.json()
-                return self._process_roads(data)
+                raw = await response.read()
+                features = await asyncio.to_thread(self._parse_and_process_features, raw)
+                _osm_cache_put(cache_key, features)
+                return features
                 
         except Exception as e:
-            print(f"Error fetching OSM roads: {e}")
-            return []
-
-    async def fetch_elevation_data(self, bbox: BoundingBox, resolution: float = 0.001) -> List[List[float]]:
-        """Fetch elevation data from Open-Elevation API"""
+            print(f"Error fetching OSM features: {e}")
+            return (), ()
+
+    async def fetch_elevation_data(
+        self,
+        bbox: BoundingBox,
+        resolution: float = 0.001,
+        batch_size: int = 1024  # Open-Elevation's per-request maximum
+    ) -> np.ndarray:
+        """Fetch a (lat_steps, lng_steps) float32 elevation grid from Open-Elevation API"""
         try:
             # Generate grid points
             lat_range = bbox.north - bbox.south
             lng_range = bbox.east - bbox.west
-            lat_steps = int(lat_range / resolution)
-            lng_steps = int(lng_range / resolution)
-
-            elevations = []
-            batch_size = 100  # API rate limiting
+            # An inverted bbox yields an empty grid rather than negative dimensions
+            lat_steps = max(0, int(lat_range / resolution))
+            lng_steps = max(0, int(lng_range / resolution))
 
-            for i in range(lat_steps):
-                row = []
-                lat = bbox.south + (i * lat_range) / lat_steps
+            lats = np.linspace(bbox.south, bbox.north, lat_steps, endpoint=False)
+            lngs = np.linspace(bbox.west, bbox.east, lng_steps, endpoint=False)
 
-                # Process in batches
-                for j in range(0, lng_steps, batch_size):
-                    batch_points = []
-                    for k in range(j, min(j + batch_size, lng_steps)):
-                        lng = bbox.west + (k * lng_range) / lng_steps
-                        batch_points.append({"latitude": lat, "longitude": lng})
+            # Row-major grid points, batched across row boundaries to fill each request
+            point_lats = np.repeat(lats, lng_steps).tolist()
+            point_lngs = np.tile(lngs, lat_steps).tolist()
+            batches = [
+                [
+                    {"latitude": lat, "longitude": lng}
+                    for lat, lng in zip(point_lats[j:j + batch_size], point_lngs[j:j + batch_size])
+                ]
+                for j in range(0, len(point_lats), batch_size)
+            ]
 
-                    batch_elevations = await self._fetch_elevation_batch(batch_points)
-                    row.extend(batch_elevations)
+            # The semaphore is the rate limit: at most a few batches in flight at once
+            semaphore = asyncio.Semaphore(self.elevation_concurrency)
 
-                    # Rate limiting delay
-                    if j + batch_size < lng_steps:
-                        await asyncio.sleep(0.1)
+            async def fetch_batch(batch_points: List[Dict[str, float]]) -> List[float]:
+                async with semaphore:
+                    return await self._fetch_elevation_batch(batch_points)
 
-                elevations.append(row)
+            results = await asyncio.gather(*(fetch_batch(batch) for batch in batches))
 
-            return elevations
+            # Batches are consecutive slices, so concatenating them restores row-major order
+            flat = [elevation for batch_elevations in results for elevation in batch_elevations]
+            return np.asarray(flat, dtype=np.float32).reshape(lat_steps, lng_steps)
 
         except Exception as e:
             print(f"Error fetching elevation data: {e}")
             # Return flat terrain as fallback
-            lat_steps = int((bbox.north - bbox.south) / resolution)
-            lng_steps = int((bbox.east - bbox.west) / resolution)
-            return [[0.0 for _ in range(lng_steps)] for _ in range(lat_steps)]
+            lat_steps = max(0, int((bbox.north - bbox.south) / resolution))
+            lng_steps = max(0, int((bbox.east - bbox.west) / resolution))
+            return np.zeros((lat_steps, lng_steps), dtype=np.float32)
 
     async def _fetch_elevation_batch(self, points: List[Dict[str, float]]) -> List[float]:
         """Fetch elevation for a batch of points"""
         try:
             async with self.session.post(
                 self.elevation_url,
-                json={"locations": points},
+                data=orjson.dumps({"locations": points}),
                 headers={"Content-Type": "application/json"}
             ) as response:
                 if response.status != 200:
                     raise Exception(f"Elevation API error: {response.status}")
                 
-                data = await response.json()
+                data = orjson.loads(await response.read())
                 return [result.get("elevation", 0.0) for result in data["results"]]
                 
         except Exception as e:
             print(f"Elevation batch fetch failed: {e}")
             return [0.0] * len(points)
 
-    def _process_buildings(self, osm_data: Dict[str, Any]) -> List[OSMBuilding]:
-        """Process OSM building data"""
-        nodes = {}
-        buildings = []
-
-        # Collect nodes
-        for element in osm_data.get("elements", []):
-            if element["type"] == "node":
-                nodes[element["id"]] = [element["lon"], element["lat"]]
-
-        # Process ways and relations
-        for element in osm_data.get("elements", []):
-            if element["type"] in ["way", "relation"] and element.get("tags", {}).get("building"):
-                coordinates = []
-
-                if element["type"] == "way" and "nodes" in element:
-                    for node_id in element["nodes"]:
-                        if node_id in nodes:
-                            coordinates.append(nodes[node_id])
-
-                if len(coordinates) > 0:
-                    height = self._calculate_building_height(element.get("tags", {}))
-                    buildings.append(OSMBuilding(
-                        id=str(element["id"]),
-                        coordinates=coordinates,
-                        tags=element.get("tags", {}),
-                        calculated_height=height
-                    ))
-
-        return buildings
-
-    def _process_roads(self, osm_data: Dict[str, Any]) -> List[OSMRoad]:
-        """Process OSM road data"""
-        nodes = {}
+    def _scan_elements(
+        self,
+        elements: List[OverpassElement]
+    ) -> Tuple[Dict[int, int], np.ndarray, np.ndarray, List[OverpassElement], List[OverpassElement]]:
+        """
+        Single pass over OSM elements collecting an id -> row node table over SoA
+        longitude/latitude arrays, plus the building and highway ways to resolve afterwards
+        """
+        id_to_idx = {}
+        lons = []
+        lats = []
+        building_ways = []
+        road_ways = []
+
+        for element in elements:
+            element_type = element.type
+            if element_type == "node":
+                id_to_idx[element.id] = len(lons)
+                lons.append(element.lon)
+                lats.append(element.lat)
+            # Relations carry no node list, so only ways yield geometry
+            elif element_type == "way" and element.nodes:
+                if "building" in element.tags:
+                    building_ways.append(element)
+                # Building ways in the combined payload may carry any highway tag
+                if _ROAD_HIGHWAY_PATTERN.fullmatch(element.tags.get("highway", "")):
+                    road_ways.append(element)
+
+        return (
+            id_to_idx,
+            np.array(lons, dtype=np.float64),
+            np.array(lats, dtype=np.float64),
+            building_ways,
+            road_ways
+        )
+
+    def _way_coordinates(
+        self,
+        node_ids: Iterable[int],
+        id_to_idx: Dict[int, int],
+        lons: np.ndarray,
+        lats: np.ndarray
+    ) -> np.ndarray:
+        """Resolve a way's node ids to an (N, 2) [lon, lat] array, skipping unknown nodes"""
+        idx = np.fromiter((id_to_idx[n] for n in node_ids if n in id_to_idx), dtype=np.int32)
+        coordinates = np.stack([lons[idx], lats[idx]], axis=1)
+        coordinates.setflags(write=False)
+        return coordinates
+
+    def _parse_and_process_features(self, raw: bytes) -> Tuple[Tuple[OSMBuilding, ...], Tuple[OSMRoad, ...]]:
+        """Parse and process a combined Overpass response (CPU-bound; run in a worker thread)"""
+        # Decode straight into typed structs; only the schema's fields are materialized
+        osm_data = _OVERPASS_DECODER.decode(raw)
+        id_to_idx, lons, lats, building_ways, road_ways = self._scan_elements(osm_data.elements)
+
+        # Both processors resolve geometry against the same node table
+        return (
+            self._process_buildings(building_ways, id_to_idx, lons, lats),
+            self._process_roads(road_ways, id_to_idx, lons, lats)
+        )
+
+    def _process_buildings(
+        self,
+        ways: List[OverpassElement],
+        id_to_idx: Dict[int, int],
+        lons: np.ndarray,
+        lats: np.ndarray
+    ) -> Tuple[OSMBuilding, ...]:
+        """Process OSM building ways against the shared node table"""
+        footprints = []
+
+        for element in ways:
+            coordinates = self._way_coordinates(element.nodes, id_to_idx, lons, lats)
+
+            if len(coordinates) > 0:
+                footprints.append((str(element.id), coordinates, types.MappingProxyType(element.tags)))
+
+        heights = self._calculate_building_heights([tags for _, _, tags in footprints])
+
+        return tuple(
+            OSMBuilding(id=way_id, coordinates=coordinates, tags=tags, calculated_height=height)
+            for (way_id, coordinates, tags), height in zip(footprints, heights.tolist())
+        )
+
+    def _process_roads(
+        self,
+        ways: List[OverpassElement],
+        id_to_idx: Dict[int, int],
+        lons: np.ndarray,
+        lats: np.ndarray
+    ) -> Tuple[OSMRoad, ...]:
+        """Process OSM road ways against the shared node table"""
         roads = []
 
-        # Collect nodes
-        for element in osm_data.get("elements", []):
-            if element["type"] == "node":
-                nodes[element["id"]] = [element["lon"], element["lat"]]
-
-        # Process ways
-        for element in osm_data.get("elements", []):
-            if element["type"] == "way" and element.get("tags", {}).get("highway"):
-                coordinates = []
-
-                if "nodes" in element:
-                    for node_id in element["nodes"]:
-                        if node_id in nodes:
-                            coordinates.append(nodes[node_id])
-
-                if len(coordinates) > 0:
-                    roads.append(OSMRoad(
-                        id=str(element["id"]),
-                        coordinates=coordinates,
-                        tags=element.get("tags", {})
-                    ))
-
-        return roads
-
-    def _calculate_building_height(self, tags: Dict[str, str]) -> float:
-        """Calculate building height from OSM tags"""
-        # Try explicit height first
-        if "height" in tags:
-            try:
-                height_str = tags["height"].replace("m", "").replace("ft", "").strip()
-                height = float(height_str)
-                # Convert feet to meters if needed
-                if "ft" in tags["height"]:
-                    height *= 0.3048
-                return height
-            except ValueError:
-                pass
-
-        # Estimate from building levels
-        if "building:levels" in tags:
-            try:
-                levels = int(tags["building:levels"])
-                return levels * 3.5  # Assume 3.5m per level
-            except ValueError:
-                pass
-
-        # Default heights by building type
-        building_type = tags.get("building", "yes")
-        default_heights = {
-            "house": 8.0,
-            "residential": 12.0,
-            "apartments": 25.0,
-            "commercial": 15.0,
-            "office": 30.0,
-            "industrial": 12.0,
-            "warehouse": 10.0,
-            "hospital": 20.0,
-            "school": 12.0,
-            "church": 15.0,
-            "yes": 10.0,  # Generic building
-        }
-
-        return default_heights.get(building_type, 10.0)
+        for element in ways:
+            coordinates = self._way_coordinates(element.nodes, id_to_idx, lons, lats)
+
+            if len(coordinates) > 0:
+                roads.append(OSMRoad(
+                    id=str(element.id),
+                    coordinates=coordinates,
+                    tags=types.MappingProxyType(element.tags)
+                ))
+
+        return tuple(roads)
+
+    def _calculate_building_heights(self, tags_list: List[Mapping[str, str]]) -> np.ndarray:
+        """Calculate building heights from OSM tags, parsing each distinct tag signature once"""
+        signature_index: Dict[Tuple[str, Optional[str], Optional[str]], int] = {}
+        inverse = np.fromiter(
+            (
+                signature_index.setdefault(
+                    (tags.get("building", "yes"), tags.get("building:levels"), tags.get("height")),
+                    len(signature_index)
+                )
+                for tags in tags_list
+            ),
+            dtype=np.intp,
+            count=len(tags_list)
+        )
+        unique_heights = np.fromiter(
+            (_height_from_signature(*signature) for signature in signature_index),
+            dtype=np.float64,
+            count=len(signature_index)
+        )
+        return unique_heights[inverse]
+
+# Default heights by building type
+DEFAULT_BUILDING_HEIGHTS = {
+    "house": 8.0,
+    "residential": 12.0,
+    "apartments": 25.0,
+    "commercial": 15.0,
+    "office": 30.0,
+    "industrial": 12.0,
+    "warehouse": 10.0,
+    "hospital": 20.0,
+    "school": 12.0,
+    "church": 15.0,
+    "yes": 10.0,  # Generic building
+}
+
+@functools.lru_cache(maxsize=4096)
+def _height_from_signature(building_type: str, levels: Optional[str], height: Optional[str]) -> float:
+    """Building height for a (building, building:levels, height) tag triple; most buildings share one"""
+    # Try explicit height first
+    if height is not None:
+        try:
+            height_m = float(height.replace("m", "").replace("ft", "").strip())
+            # Convert feet to meters if needed
+            if "ft" in height:
+                height_m *= 0.3048
+            return height_m
+        except ValueError:
+            pass
+
+    # Estimate from building levels
+    if levels is not None:
+        try:
+            return int(levels) * 3.5  # Assume 3.5m per level
+        except ValueError:
+            pass
+
+    return DEFAULT_BUILDING_HEIGHTS.get(building_type, 10.0)
 
 # FastAPI endpoint integration
 from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+def _encode_array(obj: Any) -> Any:
+    """msgspec hook for the numpy arrays and read-only tag mappings carried by features"""
+    if isinstance(obj, np.ndarray):
+        # orjson writes arrays natively, keeping float32 values at float32 precision
+        return msgspec.Raw(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY))
+    if isinstance(obj, types.MappingProxyType):
+        return dict(obj)
+    raise NotImplementedError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+_URBAN_ENCODER = msgspec.json.Encoder(enc_hook=_encode_array)
 
-async def get_real_time_urban_data(bbox_str: str) -> Dict[str, Any]:
+class UrbanDataResponse(JSONResponse):
+    """Urban data response encoded straight from OSM structs and arrays"""
+    def render(self, content: Any) -> bytes:
+        return _URBAN_ENCODER.encode(content)
+
+async def get_real_time_urban_data(bbox_str: str) -> UrbanDataResponse:
     """Fetch real-time urban data for simulation"""
     try:
         # Parse bounding box
@@ -280,51 +421,39 @@ async def get_real_time_urban_data(bbox_str: str) -> Dict[str, Any]:
             east=coords[3]
         )
 
-        async with RealTimeDataFetcher() as fetcher:
-            # Fetch all data concurrently
-            buildings_task = fetcher.fetch_osm_buildings(bbox)
-            roads_task = fetcher.fetch_osm_roads(bbox)
-            elevation_task = fetcher.fetch_elevation_data(bbox)
-
-            buildings, roads, elevations = await asyncio.gather(
-                buildings_task, roads_task, elevation_task
-            )
-
-            return {
-                "bbox": {
-                    "south": bbox.south,
-                    "west": bbox.west,
-                    "north": bbox.north,
-                    "east": bbox.east
-                },
-                "buildings": [
-                    {
-                        "id": b.id,
-                        "coordinates": b.coordinates,
-                        "tags": b.tags,
-                        "height": b.calculated_height
-                    } for b in buildings
-                ],
-                "roads": [
-                    {
-                        "id": r.id,
-                        "coordinates": r.coordinates,
-                        "tags": r.tags
-                    } for r in roads
-                ],
-                "elevation": {
-                    "data": elevations,
-                    "resolution": 0.001,
-                    "width": len(elevations[0]) if elevations else 0,
-                    "height": len(elevations)
-                },
-                "metadata": {
-                    "buildings_count": len(buildings),
-                    "roads_count": len(roads),
-                    "data_sources": ["OpenStreetMap", "Open-Elevation"],
-                    "timestamp": asyncio.get_event_loop().time()
-                }
+        fetcher = RealTimeDataFetcher()
+
+        # Fetch all data concurrently
+        features_task = fetcher.fetch_osm_features(bbox)
+        elevation_task = fetcher.fetch_elevation_data(bbox)
+
+        (buildings, roads), elevations = await asyncio.gather(
+            features_task, elevation_task
+        )
+
+        return UrbanDataResponse({
+            "bbox": {
+                "south": bbox.south,
+                "west": bbox.west,
+                "north": bbox.north,
+                "east": bbox.east
+            },
+            "buildings": buildings,
+            "roads": roads,
+            "elevation": {
+                "data": elevations,
+                "resolution": 0.001,
+                # An empty grid has no rows to measure, so it reports no width either
+                "width": elevations.shape[1] if elevations.shape[0] else 0,
+                "height": elevations.shape[0]
+            },
+            "metadata": {
+                "buildings_count": len(buildings),
+                "roads_count": len(roads),
+                "data_sources": ["OpenStreetMap", "Open-Elevation"],
+                "timestamp": time.time()
             }
+        })
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching real-time data: {str(e)}")